@@ -3,29 +3,53 @@ DevSecOps Unified Monitor Platform - Main Web Application
 SOC Dashboard for Kubernetes monitoring and security log analysis
 """
 
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import Body, FastAPI, Request, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 import uvicorn
 import json
+import orjson
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Annotated, AsyncIterator, List, Optional, Dict, Any, Tuple
 import logging
 
 # 導入 Elasticsearch 客戶端
-from .security.elasticsearch_client import get_elasticsearch_client
+from .security.elasticsearch_client import (
+    classify_threat_level,
+    close_elasticsearch_client,
+    get_elasticsearch_client,
+)
 
 # 配置日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """應用程式生命週期：啟動時建立共用的 Elasticsearch 客戶端，關閉時釋放連線"""
+    app.state.es = await get_elasticsearch_client()
+    try:
+        yield
+    finally:
+        # 同時重設全域實例，避免後續 lifespan 取得已關閉的客戶端
+        await close_elasticsearch_client()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="DevSecOps Unified Monitor Platform",
     description="SOC Dashboard for K8S monitoring and security log analysis",
-    version="1.0.0"
+    version="1.0.0",
+    # 大量 ES 查詢結果改以 orjson 序列化
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Setup templates and static files
@@ -84,6 +108,9 @@ LOG_SOURCES = {
     }
 }
 
+# 日誌源配置為靜態資料，啟動時預先序列化
+LOG_SOURCES_JSON = orjson.dumps(LOG_SOURCES)
+
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
     """SOC 主儀表板"""
@@ -114,19 +141,26 @@ class ThreatHuntingQuery(BaseModel):
     time_range: str = "24h"
     size: int = 1000
 
+# 批次威脅獵捕的查詢筆數上限（每個日誌源一筆）
+MAX_BATCH_QUERIES = len(LOG_SOURCES)
+
+class BatchThreatHuntingQuery(ThreatHuntingQuery):
+    # 批次查詢限制每筆返回數量，避免單一請求展開過大的 msearch（size=0 可僅取聚合結果）
+    size: int = Field(1000, ge=0, le=1000)
+
 class SecurityMetricsRequest(BaseModel):
     time_range: str = "24h"
 
 @app.get("/api/log-sources")
 async def get_log_sources():
     """取得日誌源配置"""
-    return LOG_SOURCES
+    return Response(content=LOG_SOURCES_JSON, media_type="application/json")
 
 @app.get("/api/elasticsearch/health")
-async def elasticsearch_health():
+async def elasticsearch_health(request: Request):
     """檢查 Elasticsearch 連線狀態"""
     try:
-        es_client = await get_elasticsearch_client()
+        es_client = request.app.state.es
         is_connected = await es_client.check_connection()
 
         if is_connected:
@@ -148,10 +182,23 @@ async def elasticsearch_health():
         )
 
 @app.post("/api/threat-hunting")
-async def execute_threat_hunting(query: ThreatHuntingQuery):
-    """執行威脅獵捕查詢"""
+async def execute_threat_hunting(query: ThreatHuntingQuery, request: Request):
+    """執行威脅獵捕查詢（Accept: application/x-ndjson 時以串流逐筆返回事件）"""
     try:
-        es_client = await get_elasticsearch_client()
+        es_client = request.app.state.es
+
+        if "application/x-ndjson" in request.headers.get("accept", ""):
+            # NDJSON 串流：第一行為統計資訊，其後每行一個事件
+            results = es_client.stream_threat_hunting_query(
+                query_dsl=query.query_dsl,
+                log_source=query.log_source,
+                time_range=query.time_range,
+                size=query.size
+            )
+            return StreamingResponse(
+                (orjson.dumps(item) + b"\n" async for item in results),
+                media_type="application/x-ndjson"
+            )
 
         # 執行威脅獵捕查詢
         result = await es_client.threat_hunting_query(
@@ -167,7 +214,8 @@ async def execute_threat_hunting(query: ThreatHuntingQuery):
                 content=result
             )
 
-        return result
+        # 直接以 orjson 序列化（HuntEvent dataclass 不經 jsonable_encoder 轉換）
+        return ORJSONResponse(content=result)
 
     except json.JSONDecodeError:
         return JSONResponse(
@@ -181,11 +229,40 @@ async def execute_threat_hunting(query: ThreatHuntingQuery):
             content={"error": f"Internal server error: {str(e)}"}
         )
 
+@app.post("/api/threat-hunting/batch")
+async def execute_threat_hunting_batch(
+    queries: Annotated[List[BatchThreatHuntingQuery], Body(min_length=1, max_length=MAX_BATCH_QUERIES)],
+    request: Request
+):
+    """以單一 msearch 執行多筆威脅獵捕查詢（結果順序與輸入相同）"""
+    try:
+        es_client = request.app.state.es
+
+        results = await es_client.batch_threat_hunting_query(
+            [query.model_dump() for query in queries]
+        )
+
+        # 所有查詢皆失敗（如 msearch 無法執行）時與單筆查詢一致返回 400
+        if all("error" in result for result in results):
+            return ORJSONResponse(
+                status_code=400,
+                content=results
+            )
+
+        return ORJSONResponse(content=results)
+
+    except Exception as e:
+        logger.error(f"Batch threat hunting query failed: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Internal server error: {str(e)}"}
+        )
+
 @app.post("/api/security-metrics")
-async def get_security_metrics(request: SecurityMetricsRequest):
+async def get_security_metrics(request: SecurityMetricsRequest, http_request: Request):
     """取得安全指標統計"""
     try:
-        es_client = await get_elasticsearch_client()
+        es_client = http_request.app.state.es
 
         # 取得安全指標
         metrics = await es_client.get_security_metrics(
@@ -208,38 +285,35 @@ async def get_security_metrics(request: SecurityMetricsRequest):
         )
 
 @app.get("/api/dashboard-data")
-async def get_dashboard_data():
+async def get_dashboard_data(request: Request):
     """取得儀表板數據（模擬數據 + 實際 ES 數據混合）"""
     try:
-        es_client = await get_elasticsearch_client()
-
-        # 嘗試從 Elasticsearch 取得實際數據
-        is_connected = await es_client.check_connection()
-
-        if is_connected:
-            # 取得實際的安全指標
-            metrics = await es_client.get_security_metrics("24h")
-
-            # 如果有實際數據，使用實際數據；否則使用模擬數據
-            if metrics.get("total_events", 0) > 0:
-                dashboard_data = {
-                    "threat_overview": {
-                        "high_threats": len([x for x, y in metrics.get("threat_levels", {}).items()
-                                           if "high" in x.lower() or "critical" in x.lower()]),
-                        "medium_alerts": len([x for x, y in metrics.get("threat_levels", {}).items()
-                                            if "medium" in x.lower() or "warning" in x.lower()]),
-                        "low_events": len([x for x, y in metrics.get("threat_levels", {}).items()
-                                         if "low" in x.lower() or "info" in x.lower()]),
-                        "resolved": metrics.get("total_events", 0) - sum(metrics.get("threat_levels", {}).values())
-                    },
-                    "log_sources_status": metrics.get("log_sources", {}),
-                    "timeline_data": metrics.get("timeline", [])
-                }
-            else:
-                # 使用模擬數據
-                dashboard_data = generate_mock_dashboard_data()
+        # 取得實際的安全指標（以 msearch 查詢，成功結果由客戶端快取）
+        metrics = await request.app.state.es.get_security_metrics("24h")
+
+        # 如果有實際數據，使用實際數據；查詢失敗 (含未連線) 或無數據時使用模擬數據
+        if "error" not in metrics and metrics.get("total_events", 0) > 0:
+            # 單次走訪威脅等級，累計各等級的事件數
+            level_counts = {"high": 0, "medium": 0, "low": 0}
+            classified_total = 0
+            for severity, count in metrics.get("threat_levels", {}).items():
+                classified_total += count
+                level = classify_threat_level(severity)
+                if level is not None:
+                    level_counts[level] += count
+
+            dashboard_data = {
+                "threat_overview": {
+                    "high_threats": level_counts["high"],
+                    "medium_alerts": level_counts["medium"],
+                    "low_events": level_counts["low"],
+                    "resolved": metrics.get("total_events", 0) - classified_total
+                },
+                "log_sources_status": metrics.get("log_sources", {}),
+                "timeline_data": metrics.get("timeline", [])
+            }
         else:
-            # Elasticsearch 未連線，使用模擬數據
+            # 使用模擬數據
             dashboard_data = generate_mock_dashboard_data()
 
         return dashboard_data
@@ -249,40 +323,54 @@ async def get_dashboard_data():
         # 發生錯誤時返回模擬數據
         return generate_mock_dashboard_data()
 
+# 模擬數據專用的亂數產生器
+_mock_rng = random.Random()
+
+@lru_cache(maxsize=1)
+def _mock_timeline_timestamps(epoch_second: int) -> Tuple[str, ...]:
+    """產生過去 24 小時的逐時時間戳（同一秒內重複使用）"""
+    now = datetime.fromtimestamp(epoch_second)
+    return tuple((now - timedelta(hours=i)).isoformat() for i in range(24, 0, -1))
+
 def generate_mock_dashboard_data():
     """生成模擬儀表板數據"""
-    import random
-    from datetime import datetime, timedelta
+    randint = _mock_rng.randint
+    timestamps = _mock_timeline_timestamps(int(time.time()))
 
     return {
         "threat_overview": {
-            "high_threats": random.randint(15, 30),
-            "medium_alerts": random.randint(100, 200),
-            "low_events": random.randint(1000, 2000),
-            "resolved": random.randint(8000, 10000)
+            "high_threats": randint(15, 30),
+            "medium_alerts": randint(100, 200),
+            "low_events": randint(1000, 2000),
+            "resolved": randint(8000, 10000)
         },
         "log_sources_status": {
             source_id: {
-                "events_count": random.randint(50, 1000),
+                "events_count": randint(50, 1000),
                 "status": "online",
-                "activity_percentage": random.randint(80, 100)
+                "activity_percentage": randint(80, 100)
             }
             for source_id in LOG_SOURCES.keys()
         },
         "timeline_data": [
             {
-                "timestamp": (datetime.now() - timedelta(hours=i)).isoformat(),
-                "count": random.randint(10, 100)
+                "timestamp": timestamp,
+                "count": randint(10, 100)
             }
-            for i in range(24, 0, -1)
+            for timestamp in timestamps
         ]
     }
 
 if __name__ == "__main__":
+    # 正式環境依 CPU 核心數啟動多個 worker；開發環境保留自動重載
+    is_production = os.getenv("APP_ENV", "development") == "production"
+
     uvicorn.run(
         "src.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=not is_production,
+        workers=os.cpu_count() if is_production else None,
+        access_log=not is_production,
         log_level="info"
     )
\ No newline at end of file
@@ -5,27 +5,131 @@ Elasticsearch Client for SOC Dashboard
 
 import asyncio
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union, Any
+from async_lru import alru_cache
 from elasticsearch import AsyncElasticsearch
 from elasticsearch.exceptions import ConnectionError, NotFoundError
+from elasticsearch.serializer import OrjsonSerializer
 import logging
 
 # 配置日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _first_field_value(data: Dict[str, Any], paths: Tuple[Tuple[str, ...], ...]) -> Any:
+    """依序走訪預先切分的欄位路徑 (如 ("threat", "severity"))，返回第一個非空值"""
+    for path in paths:
+        value = data
+        for key in path:
+            value = value.get(key) if value.__class__ is dict else None
+        if value:
+            return value
+    return None
+
+# 威脅等級分類關鍵字（依優先順序）
+_THREAT_LEVEL_KEYWORDS = (
+    ("high", ("high", "critical")),
+    ("medium", ("medium", "warning")),
+    ("low", ("low", "info")),
+)
+
+@lru_cache(maxsize=256)
+def classify_threat_level(severity: str) -> Optional[str]:
+    """將嚴重性標籤分類為 high / medium / low（結果快取，每個標籤只轉換一次）"""
+    severity = severity.lower()
+    for level, keywords in _THREAT_LEVEL_KEYWORDS:
+        if any(keyword in severity for keyword in keywords):
+            return level
+    return None
+
+def _error_reason(error: Any) -> str:
+    """取得 msearch 單項錯誤的說明文字（ES 錯誤物件取其 reason）"""
+    if isinstance(error, dict):
+        return error.get("reason") or error.get("type") or "Unknown Elasticsearch error"
+    return str(error)
+
+# 安全指標時間線的固定間隔
+_TIMELINE_INTERVAL = "1h"
+_TIMELINE_INTERVAL_MS = 60 * 60 * 1000
+
+# 威脅獵捕查詢固定依時間倒序排列
+_HUNTING_SORT = [{"@timestamp": {"order": "desc"}}]
+
+# 威脅獵捕預設只取回事件解析與跨設備關聯所需欄位（可由 query_dsl 的 _source 覆寫）
+_HUNTING_SOURCE_FIELDS = [
+    "@timestamp", "threat.*", "severity", "level", "priority",
+    "message", "description", "summary", "event.*", "log.*", "alert.*",
+    "source.*", "destination.*", "network.*",
+    "user.*", "host.*", "process.*", "file.*", "registry.*"
+]
+
+@lru_cache(maxsize=32)
+def _time_range_filter(time_range: str) -> Dict[str, Any]:
+    """建立時間範圍過濾器（依 time_range 快取，回傳值不可修改）"""
+    return {
+        "range": {
+            "@timestamp": {
+                "gte": f"now-{time_range}",
+                "lte": "now"
+            }
+        }
+    }
+
+def _wrap_query(query_dsl: Dict[str, Any], time_range: str, size: int) -> Dict[str, Any]:
+    """將使用者查詢套入威脅獵捕查詢模板（時間過濾、筆數、排序），不修改原查詢"""
+    return {
+        "_source": _HUNTING_SOURCE_FIELDS,
+        # 不計算精確總筆數，total_hits 為下限值（可由 query_dsl 覆寫）
+        "track_total_hits": False,
+        **query_dsl,
+        "query": {
+            "bool": {
+                "must": [query_dsl.get("query", {"match_all": {}})],
+                "filter": [_time_range_filter(time_range)]
+            }
+        },
+        "size": size,
+        "sort": _HUNTING_SORT
+    }
+
+@dataclass(slots=True)
+class HuntEvent:
+    """威脅獵捕事件（由 orjson 直接序列化，不需轉為 dict）"""
+    timestamp: Optional[str]
+    index: str
+    source: str
+    severity: str
+    message: str
+    raw_data: Dict[str, Any]
+
 class SecurityElasticsearchClient:
     """
     資安專用 Elasticsearch 客戶端
     專注於 SOC 威脅獵捕與日誌分析
     """
 
+    # 常見的嚴重性欄位（依優先順序，預先切分巢狀路徑）
+    _SEVERITY_PATHS = tuple(tuple(field.split(".")) for field in (
+        "threat.severity", "severity", "level", "priority",
+        "event.severity", "alert.severity", "log.level"
+    ))
+
+    # 常見的訊息欄位（依優先順序，預先切分巢狀路徑）
+    _MESSAGE_PATHS = tuple(tuple(field.split(".")) for field in (
+        "message", "description", "event.original",
+        "log.message", "event.description", "summary"
+    ))
+
     def __init__(self,
                  hosts: List[str] = ["http://localhost:9200"],
                  username: str = None,
                  password: str = None,
-                 verify_certs: bool = True):
+                 verify_certs: bool = True,
+                 connections_per_node: int = 100,
+                 sniff_on_node_failure: bool = False):
         """
         初始化 Elasticsearch 連線
 
@@ -34,6 +138,9 @@ class SecurityElasticsearchClient:
             username: 認證用戶名
             password: 認證密碼
             verify_certs: 是否驗證 SSL 憑證
+            connections_per_node: 每個節點的連線池大小（需對應並行查詢數）
+            sniff_on_node_failure: 節點失敗時是否探測叢集節點（K8S 透過 Service 連線時
+                節點 publish_address 通常無法從 Pod 存取，預設關閉）
         """
         self.hosts = hosts
 
@@ -45,6 +152,10 @@ class SecurityElasticsearchClient:
         self.client = AsyncElasticsearch(
             hosts=hosts,
             verify_certs=verify_certs,
+            serializer=OrjsonSerializer(),
+            connections_per_node=connections_per_node,
+            http_compress=True,
+            sniff_on_node_failure=sniff_on_node_failure,
             **auth_config
         )
 
@@ -59,6 +170,13 @@ class SecurityElasticsearchClient:
             "manage_engine": "manageengine-*"
         }
 
+        # 預先計算的索引字串與前綴映射（避免每次查詢重建）
+        self._all_indices = ",".join(self.log_source_indices.values())
+        self._index_prefix_map = tuple(
+            (pattern.replace("*", ""), source)
+            for source, pattern in self.log_source_indices.items()
+        )
+
     async def check_connection(self) -> bool:
         """檢查 Elasticsearch 連線狀態"""
         try:
@@ -88,6 +206,69 @@ class SecurityElasticsearchClient:
             logger.error(f"Failed to get cluster health: {e}")
             return {"status": "unknown", "error": str(e)}
 
+    def _resolve_index(self, log_source: Optional[str]) -> str:
+        """確定查詢的索引（未指定或未知日誌源時查詢所有日誌源）"""
+        if log_source and log_source in self.log_source_indices:
+            return self.log_source_indices[log_source]
+        return self._all_indices
+
+    async def _execute_hunting_search(self,
+                                      query_dsl: Dict[str, Any],
+                                      log_source: str = None,
+                                      time_range: str = "24h",
+                                      size: int = 1000) -> Tuple[Dict[str, Any], str, int]:
+        """組合並執行威脅獵捕查詢，返回 (查詢回應, 查詢索引, 查詢耗時毫秒)"""
+        index = self._resolve_index(log_source)
+
+        # 套用查詢模板（時間範圍、筆數、排序）
+        body = _wrap_query(query_dsl, time_range, size)
+
+        start_time = time.perf_counter_ns()
+
+        # 執行查詢
+        response = await self.client.search(
+            index=index,
+            body=body,
+            request_timeout=30
+        )
+
+        query_time_ms = (time.perf_counter_ns() - start_time) // 1_000_000
+
+        return response, index, query_time_ms
+
+    def _build_hunting_summary(self,
+                               response: Dict[str, Any],
+                               index: str,
+                               query_time_ms: int) -> Dict[str, Any]:
+        """整理威脅獵捕查詢的統計資訊（不含事件）"""
+        # 處理聚合結果
+        aggregations = {}
+        if "aggregations" in response:
+            aggregations = self._process_aggregations(response["aggregations"])
+
+        # 未計算總筆數時以返回筆數作為下限值
+        total = response["hits"].get("total")
+        total_hits = total["value"] if total else len(response["hits"]["hits"])
+
+        return {
+            "total_hits": total_hits,
+            "query_time_ms": query_time_ms,
+            "aggregations": aggregations,
+            "indices_searched": index.split(",") if "," in index else [index]
+        }
+
+    def _build_hunting_event(self, hit: Dict[str, Any]) -> HuntEvent:
+        """從單筆查詢結果提取關鍵資訊"""
+        source_data = hit["_source"]
+        return HuntEvent(
+            timestamp=source_data.get("@timestamp"),
+            index=hit["_index"],
+            source=self._map_index_to_source(hit["_index"]),
+            severity=self._extract_severity(source_data),
+            message=self._extract_message(source_data),
+            raw_data=source_data
+        )
+
     async def threat_hunting_query(self,
                                    query_dsl: Dict[str, Any],
                                    log_source: str = None,
@@ -106,74 +287,16 @@ class SecurityElasticsearchClient:
             查詢結果與統計資訊
         """
         try:
-            # 確定查詢的索引
-            if log_source and log_source in self.log_source_indices:
-                index = self.log_source_indices[log_source]
-            else:
-                # 查詢所有日誌源
-                index = ",".join(self.log_source_indices.values())
-
-            # 添加時間範圍過濾器
-            if "bool" not in query_dsl.get("query", {}):
-                query_dsl["query"] = {"bool": {"must": [query_dsl.get("query", {"match_all": {}})]}}
-
-            # 時間範圍轉換
-            time_filter = {
-                "range": {
-                    "@timestamp": {
-                        "gte": f"now-{time_range}",
-                        "lte": "now"
-                    }
-                }
-            }
-
-            if "filter" not in query_dsl["query"]["bool"]:
-                query_dsl["query"]["bool"]["filter"] = []
-            query_dsl["query"]["bool"]["filter"].append(time_filter)
-
-            # 設定查詢參數
-            query_dsl["size"] = size
-            query_dsl["sort"] = [{"@timestamp": {"order": "desc"}}]
-
-            start_time = datetime.now()
-
-            # 執行查詢
-            response = await self.client.search(
-                index=index,
-                body=query_dsl,
-                request_timeout=30
+            response, index, query_time_ms = await self._execute_hunting_search(
+                query_dsl, log_source, time_range, size
             )
 
-            query_time = (datetime.now() - start_time).total_seconds() * 1000
-
-            # 處理結果
-            hits = response["hits"]["hits"]
-            total_count = response["hits"]["total"]["value"]
-
             # 提取關鍵資訊
-            events = []
-            for hit in hits:
-                source_data = hit["_source"]
-                events.append({
-                    "timestamp": source_data.get("@timestamp"),
-                    "index": hit["_index"],
-                    "source": self._map_index_to_source(hit["_index"]),
-                    "severity": self._extract_severity(source_data),
-                    "message": self._extract_message(source_data),
-                    "raw_data": source_data
-                })
-
-            # 處理聚合結果
-            aggregations = {}
-            if "aggregations" in response:
-                aggregations = self._process_aggregations(response["aggregations"])
+            events = [self._build_hunting_event(hit) for hit in response["hits"]["hits"]]
 
             return {
-                "total_hits": total_count,
-                "query_time_ms": round(query_time),
-                "events": events,
-                "aggregations": aggregations,
-                "indices_searched": index.split(",") if "," in index else [index]
+                **self._build_hunting_summary(response, index, query_time_ms),
+                "events": events
             }
 
         except Exception as e:
@@ -186,88 +309,245 @@ class SecurityElasticsearchClient:
                 "aggregations": {}
             }
 
-    async def get_security_metrics(self, time_range: str = "24h") -> Dict[str, Any]:
+    async def stream_threat_hunting_query(self,
+                                          query_dsl: Dict[str, Any],
+                                          log_source: str = None,
+                                          time_range: str = "24h",
+                                          size: int = 1000) -> AsyncIterator[Union[Dict[str, Any], HuntEvent]]:
         """
-        取得安全指標統計
+        以串流方式執行威脅獵捕查詢
+
+        第一筆為統計資訊 (total_hits, query_time_ms, aggregations, indices_searched)，
+        之後每筆為一個事件，不需在記憶體中建立完整的事件列表。
 
         Args:
-            time_range: 時間範圍
+            query_dsl: Elasticsearch DSL 查詢
+            log_source: 指定日誌源 (可選)
+            time_range: 時間範圍 (1h, 6h, 24h, 7d, 30d)
+            size: 返回結果數量限制
+
+        Yields:
+            統計資訊，接著為逐筆事件；失敗時僅產生一筆包含 error 的統計資訊
+        """
+        try:
+            response, index, query_time_ms = await self._execute_hunting_search(
+                query_dsl, log_source, time_range, size
+            )
+        except Exception as e:
+            logger.error(f"Threat hunting query failed: {e}")
+            yield {
+                "error": str(e),
+                "total_hits": 0,
+                "query_time_ms": 0,
+                "aggregations": {}
+            }
+            return
+
+        yield self._build_hunting_summary(response, index, query_time_ms)
+
+        for hit in response["hits"]["hits"]:
+            yield self._build_hunting_event(hit)
+
+    async def batch_threat_hunting_query(self,
+                                         queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        以單一 msearch 往返執行多筆威脅獵捕查詢
+
+        Args:
+            queries: 查詢列表，每筆包含 query_dsl，以及可選的 log_source、time_range、size
 
         Returns:
-            安全指標數據
+            與輸入順序對應的查詢結果（格式同 threat_hunting_query，失敗項目包含 error 欄位）
         """
+        indices = [self._resolve_index(query.get("log_source")) for query in queries]
+        requests = [
+            {
+                "index": index,
+                "body": _wrap_query(query["query_dsl"],
+                                    query.get("time_range", "24h"),
+                                    query.get("size", 1000))
+            }
+            for index, query in zip(indices, queries)
+        ]
+
         try:
-            # 威脅等級聚合查詢
-            threat_query = {
-                "query": {
-                    "bool": {
-                        "filter": [
-                            {"range": {"@timestamp": {"gte": f"now-{time_range}"}}}
-                        ]
+            start_time = time.perf_counter_ns()
+            responses = await self.batch_search(requests)
+            query_time_ms = (time.perf_counter_ns() - start_time) // 1_000_000
+        except Exception as e:
+            logger.error(f"Batch threat hunting query failed: {e}")
+            responses = [{"error": str(e)} for _ in queries]
+            query_time_ms = 0
+
+        results = []
+        for index, response in zip(indices, responses):
+            if "error" in response:
+                results.append({
+                    # 保留 ES 錯誤物件，讓呼叫端可直接解析
+                    "error": response["error"],
+                    "total_hits": 0,
+                    "query_time_ms": 0,
+                    "events": [],
+                    "aggregations": {}
+                })
+                continue
+
+            results.append({
+                **self._build_hunting_summary(response, index, query_time_ms),
+                "events": [self._build_hunting_event(hit) for hit in response["hits"]["hits"]]
+            })
+
+        return results
+
+    async def batch_search(self,
+                           requests: List[Dict[str, Any]],
+                           request_timeout: int = 30) -> List[Dict[str, Any]]:
+        """
+        以 msearch 將多個查詢合併為單一 HTTP 往返
+
+        Args:
+            requests: 查詢列表，每筆為 {"index": 索引, "body": 查詢 DSL}
+            request_timeout: 查詢逾時秒數
+
+        Returns:
+            與輸入順序對應的回應列表（失敗項目包含 error 欄位）
+        """
+        if not requests:
+            return []
+
+        # 組成 NDJSON 的 header/body 配對
+        searches = []
+        for request in requests:
+            searches.append({"index": request["index"]})
+            searches.append(request["body"])
+
+        response = await self.client.options(request_timeout=request_timeout).msearch(
+            body=searches
+        )
+
+        return list(response["responses"])
+
+    def build_security_metrics_search(self, time_range: str = "24h") -> Dict[str, Any]:
+        """建立安全指標統計查詢（可直接用於 batch_search）"""
+        # 威脅等級聚合查詢
+        threat_query = {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"range": {"@timestamp": {"gte": f"now-{time_range}"}}}
+                    ]
+                }
+            },
+            "size": 0,
+            "aggs": {
+                "threat_levels": {
+                    "terms": {
+                        "field": "threat.severity.keyword",
+                        "size": 10
                     }
                 },
-                "size": 0,
-                "aggs": {
-                    "threat_levels": {
-                        "terms": {
-                            "field": "threat.severity.keyword",
-                            "size": 10
-                        }
-                    },
-                    "log_sources": {
-                        "terms": {
-                            "field": "_index",
-                            "size": 10
-                        }
-                    },
-                    "timeline": {
-                        "date_histogram": {
-                            "field": "@timestamp",
-                            "calendar_interval": "1h",
-                            "min_doc_count": 0
-                        }
+                "log_sources": {
+                    "terms": {
+                        "field": "_index",
+                        "size": 10
+                    }
+                },
+                "timeline": {
+                    "date_histogram": {
+                        "field": "@timestamp",
+                        "fixed_interval": _TIMELINE_INTERVAL,
+                        # date_histogram 預設 min_doc_count 為 0 會回傳空桶，空桶改由 parse_security_metrics 補零
+                        "min_doc_count": 1
                     }
                 }
             }
+        }
 
-            # 執行所有日誌源的統計查詢
-            index = ",".join(self.log_source_indices.values())
-            response = await self.client.search(
-                index=index,
-                body=threat_query,
-                request_timeout=10
-            )
-
-            # 處理聚合結果
-            aggs = response.get("aggregations", {})
-
-            # 威脅等級分佈
-            threat_levels = {}
-            for bucket in aggs.get("threat_levels", {}).get("buckets", []):
-                threat_levels[bucket["key"]] = bucket["doc_count"]
-
-            # 日誌源分佈
-            log_sources = {}
-            for bucket in aggs.get("log_sources", {}).get("buckets", []):
-                source_name = self._map_index_to_source(bucket["key"])
-                log_sources[source_name] = bucket["doc_count"]
-
-            # 時間線數據
-            timeline = []
-            for bucket in aggs.get("timeline", {}).get("buckets", []):
-                timeline.append({
-                    "timestamp": bucket["key"],
-                    "count": bucket["doc_count"]
-                })
+        # 查詢所有日誌源
+        return {
+            "index": self._all_indices,
+            "body": threat_query
+        }
 
+    def parse_security_metrics(self,
+                               response: Dict[str, Any],
+                               time_range: str = "24h") -> Dict[str, Any]:
+        """將安全指標查詢回應轉換為統計數據"""
+        if "error" in response:
+            # msearch 中單一查詢失敗
             return {
-                "total_events": response["hits"]["total"]["value"],
-                "threat_levels": threat_levels,
-                "log_sources": log_sources,
-                "timeline": timeline,
-                "time_range": time_range
+                "total_events": 0,
+                "threat_levels": {},
+                "log_sources": {},
+                "timeline": [],
+                "error": _error_reason(response["error"])
             }
 
+        # 處理聚合結果
+        aggs = response.get("aggregations", {})
+
+        # 威脅等級分佈
+        threat_levels = {}
+        for bucket in aggs.get("threat_levels", {}).get("buckets", []):
+            threat_levels[bucket["key"]] = bucket["doc_count"]
+
+        # 日誌源分佈
+        log_sources = {}
+        for bucket in aggs.get("log_sources", {}).get("buckets", []):
+            source_name = self._map_index_to_source(bucket["key"])
+            log_sources[source_name] = bucket["doc_count"]
+
+        # 時間線數據（ES 不回傳空桶，於此補零以維持連續時間軸）
+        timeline = []
+        next_timestamp = None
+        for bucket in aggs.get("timeline", {}).get("buckets", []):
+            if next_timestamp is not None:
+                while next_timestamp < bucket["key"]:
+                    timeline.append({"timestamp": next_timestamp, "count": 0})
+                    next_timestamp += _TIMELINE_INTERVAL_MS
+            timeline.append({
+                "timestamp": bucket["key"],
+                "count": bucket["doc_count"]
+            })
+            next_timestamp = bucket["key"] + _TIMELINE_INTERVAL_MS
+
+        return {
+            "total_events": response["hits"]["total"]["value"],
+            "threat_levels": threat_levels,
+            "log_sources": log_sources,
+            "timeline": timeline,
+            "time_range": time_range
+        }
+
+    @alru_cache(maxsize=8, ttl=30)
+    async def _fetch_security_metrics(self, time_range: str) -> Dict[str, Any]:
+        """以 msearch 執行安全指標查詢（依 time_range 快取成功結果 30 秒，失敗時拋出例外）"""
+        # 執行所有日誌源的統計查詢
+        responses = await self.batch_search(
+            [self.build_security_metrics_search(time_range)],
+            request_timeout=10
+        )
+        metrics = self.parse_security_metrics(responses[0], time_range)
+
+        # 以例外回報失敗，避免錯誤結果被快取
+        if "error" in metrics:
+            raise RuntimeError(metrics["error"])
+
+        return metrics
+
+    async def get_security_metrics(self, time_range: str = "24h") -> Dict[str, Any]:
+        """
+        取得安全指標統計（成功結果依 time_range 快取 30 秒）
+
+        Args:
+            time_range: 時間範圍
+
+        Returns:
+            安全指標數據
+        """
+        try:
+            return await self._fetch_security_metrics(time_range)
+
         except Exception as e:
             logger.error(f"Failed to get security metrics: {e}")
             return {
@@ -280,63 +560,25 @@ class SecurityElasticsearchClient:
 
     def _map_index_to_source(self, index_name: str) -> str:
         """將索引名稱映射到日誌源名稱"""
-        for source, pattern in self.log_source_indices.items():
-            if pattern.replace("*", "") in index_name:
+        for prefix, source in self._index_prefix_map:
+            if prefix in index_name:
                 return source
         return "unknown"
 
     def _extract_severity(self, source_data: Dict[str, Any]) -> str:
         """從日誌資料中提取嚴重性等級"""
-        # 常見的嚴重性欄位
-        severity_fields = [
-            "threat.severity", "severity", "level", "priority",
-            "event.severity", "alert.severity", "log.level"
-        ]
-
-        for field in severity_fields:
-            if "." in field:
-                # 處理嵌套欄位 (如 threat.severity)
-                keys = field.split(".")
-                value = source_data
-                try:
-                    for key in keys:
-                        value = value[key]
-                    if value:
-                        return str(value).lower()
-                except (KeyError, TypeError):
-                    continue
-            else:
-                # 處理直接欄位
-                if field in source_data and source_data[field]:
-                    return str(source_data[field]).lower()
+        value = _first_field_value(source_data, self._SEVERITY_PATHS)
+        if value:
+            return str(value).lower()
 
         # 預設為低危
         return "低危"
 
     def _extract_message(self, source_data: Dict[str, Any]) -> str:
         """從日誌資料中提取訊息內容"""
-        # 常見的訊息欄位
-        message_fields = [
-            "message", "description", "event.original",
-            "log.message", "event.description", "summary"
-        ]
-
-        for field in message_fields:
-            if "." in field:
-                # 處理嵌套欄位
-                keys = field.split(".")
-                value = source_data
-                try:
-                    for key in keys:
-                        value = value[key]
-                    if value:
-                        return str(value)[:200]  # 限制長度
-                except (KeyError, TypeError):
-                    continue
-            else:
-                # 處理直接欄位
-                if field in source_data and source_data[field]:
-                    return str(source_data[field])[:200]  # 限制長度
+        value = _first_field_value(source_data, self._MESSAGE_PATHS)
+        if value:
+            return str(value)[:200]  # 限制長度
 
         # 如果找不到訊息欄位，返回索引名稱
         return "Security event detected"
@@ -378,6 +620,13 @@ async def get_elasticsearch_client() -> SecurityElasticsearchClient:
             _es_client = MockElasticsearchClient()
     return _es_client
 
+async def close_elasticsearch_client() -> None:
+    """關閉並重設全域客戶端實例（下次取得時重新建立）"""
+    global _es_client
+    if _es_client is not None:
+        await _es_client.close()
+        _es_client = None
+
 class MockElasticsearchClient:
     """模擬 Elasticsearch 客戶端，用於無 Elasticsearch 環境"""
 
@@ -397,6 +646,28 @@ class MockElasticsearchClient:
             "error": "Elasticsearch not available - using mock data"
         }
 
+    async def batch_threat_hunting_query(self, queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "total_hits": 0,
+                "query_time_ms": 0,
+                "events": [],
+                "aggregations": {},
+                "error": "Elasticsearch not available - using mock data"
+            }
+            for _ in queries
+        ]
+
+    async def stream_threat_hunting_query(self, query_dsl: Dict[str, Any], log_source: str = None,
+                                          time_range: str = "24h",
+                                          size: int = 1000) -> AsyncIterator[Union[Dict[str, Any], HuntEvent]]:
+        yield {
+            "total_hits": 0,
+            "query_time_ms": 0,
+            "aggregations": {},
+            "error": "Elasticsearch not available - using mock data"
+        }
+
     async def get_security_metrics(self, time_range: str = "24h") -> Dict[str, Any]:
         return {
             "total_events": 0,
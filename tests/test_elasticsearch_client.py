@@ -0,0 +1,192 @@
+"""
+SecurityElasticsearchClient 單元測試
+"""
+
+import asyncio
+import copy
+
+import orjson
+import pytest
+from fastapi.responses import ORJSONResponse
+
+from src.security.elasticsearch_client import HuntEvent, SecurityElasticsearchClient, _time_range_filter, _wrap_query
+
+HOUR_MS = 60 * 60 * 1000
+
+
+@pytest.fixture
+def es_client() -> SecurityElasticsearchClient:
+    return SecurityElasticsearchClient()
+
+
+def test_security_metrics_search_skips_empty_timeline_buckets(es_client: SecurityElasticsearchClient) -> None:
+    search = es_client.build_security_metrics_search("24h")
+    histogram = search["body"]["aggs"]["timeline"]["date_histogram"]
+
+    assert histogram["fixed_interval"] == "1h"
+    assert histogram["min_doc_count"] == 1
+
+
+def test_parse_security_metrics_zero_fills_sparse_timeline(es_client: SecurityElasticsearchClient) -> None:
+    start = 1_700_000_000_000 // HOUR_MS * HOUR_MS
+    response = {
+        "hits": {"total": {"value": 7}},
+        "aggregations": {
+            "timeline": {
+                "buckets": [
+                    {"key": start, "doc_count": 3},
+                    {"key": start + 3 * HOUR_MS, "doc_count": 4},
+                ]
+            }
+        }
+    }
+
+    metrics = es_client.parse_security_metrics(response, "24h")
+
+    assert metrics["timeline"] == [
+        {"timestamp": start, "count": 3},
+        {"timestamp": start + HOUR_MS, "count": 0},
+        {"timestamp": start + 2 * HOUR_MS, "count": 0},
+        {"timestamp": start + 3 * HOUR_MS, "count": 4},
+    ]
+    assert metrics["total_events"] == 7
+
+
+def test_parse_security_metrics_empty_timeline(es_client: SecurityElasticsearchClient) -> None:
+    response = {"hits": {"total": {"value": 0}}, "aggregations": {"timeline": {"buckets": []}}}
+
+    assert es_client.parse_security_metrics(response, "24h")["timeline"] == []
+
+
+class _FlakyMsearchClient:
+    """第一次 msearch 失敗、之後成功的 AsyncElasticsearch 替身"""
+
+    def __init__(self, response: dict) -> None:
+        self.response = response
+        self.calls = 0
+
+    def options(self, **kwargs) -> "_FlakyMsearchClient":
+        return self
+
+    async def msearch(self, **kwargs) -> dict:
+        self.calls += 1
+        if self.calls == 1:
+            raise ConnectionError("Connection error")
+        return {"responses": [self.response]}
+
+
+def test_get_security_metrics_does_not_cache_failures(es_client: SecurityElasticsearchClient) -> None:
+    es_client.client = _FlakyMsearchClient({"hits": {"total": {"value": 5}}, "aggregations": {}})
+
+    async def fetch_three_times() -> list:
+        return [await es_client.get_security_metrics("1h") for _ in range(3)]
+
+    failed, recovered, cached = asyncio.run(fetch_three_times())
+
+    assert "error" in failed
+    assert recovered["total_events"] == 5
+    assert cached == recovered
+    assert es_client.client.calls == 2
+
+
+class _RecordingMsearchClient:
+    """記錄 options 與 msearch 參數的 AsyncElasticsearch 替身"""
+
+    def __init__(self, responses: list) -> None:
+        self.responses = responses
+        self.options_kwargs = None
+        self.msearch_kwargs = None
+
+    def options(self, **kwargs) -> "_RecordingMsearchClient":
+        self.options_kwargs = kwargs
+        return self
+
+    async def msearch(self, **kwargs) -> dict:
+        self.msearch_kwargs = kwargs
+        return {"responses": self.responses}
+
+
+def test_batch_search_sets_timeout_through_options(es_client: SecurityElasticsearchClient) -> None:
+    es_client.client = _RecordingMsearchClient([{"hits": {"hits": []}}])
+
+    responses = asyncio.run(es_client.batch_search(
+        [{"index": "paloalto-*", "body": {"size": 0}}],
+        request_timeout=10
+    ))
+
+    assert responses == [{"hits": {"hits": []}}]
+    assert es_client.client.options_kwargs == {"request_timeout": 10}
+    assert es_client.client.msearch_kwargs == {"body": [{"index": "paloalto-*"}, {"size": 0}]}
+
+
+def test_get_security_metrics_does_not_cache_failed_msearch_item(es_client: SecurityElasticsearchClient) -> None:
+    es_client.client = _RecordingMsearchClient([{"error": {"type": "index_not_found_exception", "reason": "no such index"}}])
+
+    async def fetch_after_failure() -> tuple:
+        failed = await es_client.get_security_metrics("6h")
+        es_client.client.responses = [{"hits": {"total": {"value": 2}}, "aggregations": {}}]
+        return failed, await es_client.get_security_metrics("6h")
+
+    failed, recovered = asyncio.run(fetch_after_failure())
+
+    assert "error" in failed
+    assert recovered["total_events"] == 2
+
+
+def test_parse_security_metrics_reports_msearch_error_reason(es_client: SecurityElasticsearchClient) -> None:
+    response = {"error": {"type": "index_not_found_exception", "reason": "no such index"}, "status": 404}
+
+    assert es_client.parse_security_metrics(response, "24h")["error"] == "no such index"
+
+
+def test_batch_threat_hunting_query_keeps_es_error_object(es_client: SecurityElasticsearchClient) -> None:
+    error = {"type": "parsing_exception", "reason": "unknown query [matc]"}
+    es_client.client = _RecordingMsearchClient([{"error": error, "status": 400}])
+
+    results = asyncio.run(es_client.batch_threat_hunting_query([{"query_dsl": {"query": {"matc": {}}}}]))
+
+    assert results[0]["error"] == error
+
+
+def test_hunting_source_fields_cover_template_evidence() -> None:
+    source_fields = _wrap_query({}, "24h", 10)["_source"]
+
+    for field in ("user.*", "host.*", "process.*", "file.*", "registry.*"):
+        assert field in source_fields
+
+
+def test_wrap_query_does_not_mutate_query_dsl() -> None:
+    query_dsl = {"query": {"term": {"event.action": "deny"}}, "aggs": {"by_ip": {"terms": {"field": "source.ip"}}}}
+    original = copy.deepcopy(query_dsl)
+
+    body = _wrap_query(query_dsl, "1h", 50)
+
+    assert query_dsl == original
+    assert body["query"]["bool"] == {
+        "must": [{"term": {"event.action": "deny"}}],
+        "filter": [_time_range_filter("1h")],
+    }
+    assert body["aggs"] == original["aggs"]
+    assert body["size"] == 50
+
+
+def test_hunt_event_serializes_through_orjson_response() -> None:
+    event = HuntEvent(
+        timestamp="2024-01-01T00:00:00Z",
+        index="paloalto-2024.01.01",
+        source="paloalto",
+        severity="high",
+        message="deny",
+        raw_data={"source": {"ip": "10.0.0.1"}},
+    )
+
+    body = orjson.loads(ORJSONResponse(content={"events": [event]}).body)
+
+    assert body == {"events": [{
+        "timestamp": "2024-01-01T00:00:00Z",
+        "index": "paloalto-2024.01.01",
+        "source": "paloalto",
+        "severity": "high",
+        "message": "deny",
+        "raw_data": {"source": {"ip": "10.0.0.1"}},
+    }]}
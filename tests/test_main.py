@@ -0,0 +1,176 @@
+"""
+FastAPI 應用程式單元測試
+"""
+
+import asyncio
+import logging
+from typing import Iterator
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import MAX_BATCH_QUERIES, app, lifespan
+from src.security.elasticsearch_client import MockElasticsearchClient, SecurityElasticsearchClient
+
+
+def test_lifespan_creates_fresh_client_after_shutdown() -> None:
+    clients = []
+
+    async def run_lifespan() -> None:
+        async with lifespan(app):
+            clients.append(app.state.es)
+
+    asyncio.run(run_lifespan())
+    asyncio.run(run_lifespan())
+
+    assert clients[0] is not clients[1]
+
+
+@pytest.fixture
+def api_client() -> Iterator[TestClient]:
+    with TestClient(app) as client:
+        app.state.es = MockElasticsearchClient()
+        yield client
+
+
+def test_threat_hunting_batch_rejects_more_queries_than_log_sources(api_client: TestClient) -> None:
+    queries = [{"query_dsl": {}} for _ in range(MAX_BATCH_QUERIES + 1)]
+
+    response = api_client.post("/api/threat-hunting/batch", json=queries)
+
+    assert response.status_code == 422
+
+
+def test_threat_hunting_batch_rejects_oversized_query(api_client: TestClient) -> None:
+    response = api_client.post("/api/threat-hunting/batch", json=[{"query_dsl": {}, "size": 10000}])
+
+    assert response.status_code == 422
+
+
+def test_threat_hunting_batch_returns_400_when_every_query_fails(api_client: TestClient) -> None:
+    response = api_client.post("/api/threat-hunting/batch", json=[{"query_dsl": {}}, {"query_dsl": {}}])
+
+    assert response.status_code == 400
+    assert all("error" in result for result in response.json())
+
+
+def test_threat_hunting_single_query_allows_aggregation_only_size(api_client: TestClient) -> None:
+    response = api_client.post("/api/threat-hunting", json={"query_dsl": {"aggs": {}}, "size": 0})
+
+    assert response.status_code == 400  # 通過驗證，由模擬客戶端返回查詢錯誤
+
+
+def test_threat_hunting_batch_allows_aggregation_only_size(api_client: TestClient) -> None:
+    response = api_client.post("/api/threat-hunting/batch", json=[{"query_dsl": {"aggs": {}}, "size": 0}])
+
+    assert response.status_code == 400  # 通過驗證，由模擬客戶端返回查詢錯誤
+
+
+def test_dashboard_falls_back_to_mock_data_silently_without_elasticsearch(
+    api_client: TestClient, caplog: pytest.LogCaptureFixture
+) -> None:
+    with caplog.at_level(logging.ERROR):
+        response = api_client.get("/api/dashboard-data")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"threat_overview", "log_sources_status", "timeline_data"}
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+
+class _StaticMetricsClient(MockElasticsearchClient):
+    """返回固定安全指標的客戶端替身"""
+
+    def __init__(self, metrics: dict) -> None:
+        self.metrics = metrics
+
+    async def get_security_metrics(self, time_range: str = "24h") -> dict:
+        return self.metrics
+
+
+def test_dashboard_sums_event_counts_per_threat_level(api_client: TestClient) -> None:
+    app.state.es = _StaticMetricsClient({
+        "total_events": 100,
+        "threat_levels": {"High": 5, "critical": 3, "Medium": 10, "warning": 2, "low": 20, "info": 7, "other": 4},
+        "log_sources": {"paloalto": 60},
+        "timeline": [],
+    })
+
+    response = api_client.get("/api/dashboard-data")
+
+    assert response.status_code == 200
+    assert response.json()["threat_overview"] == {
+        "high_threats": 8,
+        "medium_alerts": 12,
+        "low_events": 27,
+        "resolved": 49,
+    }
+    assert response.json()["log_sources_status"] == {"paloalto": 60}
+
+
+class _StaticSearchClient:
+    """返回固定查詢結果的 AsyncElasticsearch 替身"""
+
+    def __init__(self, response: dict) -> None:
+        self.response = response
+
+    async def search(self, **kwargs) -> dict:
+        return self.response
+
+
+def test_threat_hunting_streams_summary_then_one_line_per_event(api_client: TestClient) -> None:
+    hits = [
+        {"_index": "paloalto-2024.01.01", "_source": {"@timestamp": "2024-01-01T00:00:00Z", "severity": "high", "message": "deny"}},
+        {"_index": "paloalto-2024.01.01", "_source": {"@timestamp": "2024-01-01T00:01:00Z", "severity": "low", "message": "allow"}},
+    ]
+    es_client = SecurityElasticsearchClient()
+    es_client.client = _StaticSearchClient({"hits": {"hits": hits}})
+    app.state.es = es_client
+
+    response = api_client.post(
+        "/api/threat-hunting",
+        json={"query_dsl": {}, "log_source": "paloalto"},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    summary, *events = [orjson.loads(line) for line in response.text.splitlines()]
+    assert summary["total_hits"] == 2
+    assert "events" not in summary
+    assert [event["message"] for event in events] == ["deny", "allow"]
+    assert [event["severity"] for event in events] == ["high", "low"]
+
+
+class _StaticMsearchClient:
+    """返回固定 msearch 結果的 AsyncElasticsearch 替身"""
+
+    def __init__(self, responses: list) -> None:
+        self.responses = responses
+
+    def options(self, **kwargs) -> "_StaticMsearchClient":
+        return self
+
+    async def msearch(self, **kwargs) -> dict:
+        return {"responses": self.responses}
+
+
+def test_threat_hunting_batch_returns_200_with_per_item_errors_on_partial_failure(api_client: TestClient) -> None:
+    error = {"type": "parsing_exception", "reason": "unknown query [matc]"}
+    es_client = SecurityElasticsearchClient()
+    es_client.client = _StaticMsearchClient([
+        {"hits": {"hits": [{"_index": "paloalto-2024.01.01", "_source": {"message": "deny"}}]}},
+        {"error": error, "status": 400},
+    ])
+    app.state.es = es_client
+
+    response = api_client.post(
+        "/api/threat-hunting/batch",
+        json=[{"query_dsl": {}, "log_source": "paloalto"}, {"query_dsl": {"query": {"matc": {}}}}],
+    )
+
+    assert response.status_code == 200
+    succeeded, failed = response.json()
+    assert "error" not in succeeded
+    assert [event["message"] for event in succeeded["events"]] == ["deny"]
+    assert failed["error"] == error